@@ -2,7 +2,7 @@
 # -----------------------------------------------------------------------------
 # Enrich a period CSV (e.g., first column like '2019Q3') with KO–PEP co-movement
 # numbers, using LOCAL price files (no web calls). It:
-#   • reads KO.csv and PEP.csv you saved earlier,
+#   • reads the KO and PEP price files you saved earlier (Parquet, else CSV),
 #   • computes daily log returns from Adj Close (falls back to Close),
 #   • builds a rolling correlation series,
 #   • buckets by quarter (YYYYQ#) using the ROLLING WINDOW END DATE,
@@ -19,9 +19,9 @@ import pandas as pd
 CSV_IN   = "ko_pep_sim_by_period.csv"                 # input CSV with 2019Q3-style period labels
 CSV_OUT  = "ko_pep_sim_by_period_with_corr.csv"       # output CSV path
 
-PRICE_DIR = "price_store"                              # folder containing KO.csv, PEP.csv
-FILE_A    = "KO.csv"                                   # first ticker file
-FILE_B    = "PEP.csv"                                  # second ticker file
+PRICE_DIR = "price_store"                              # folder containing KO/PEP .parquet (or .csv)
+FILE_A    = "KO.csv"                                   # first ticker file (.parquet sibling preferred)
+FILE_B    = "PEP.csv"                                  # second ticker file (.parquet sibling preferred)
 
 ROLLING_WINDOW = 120                              # trading days (e.g., 60 ≈ ~3 months)
 
@@ -33,23 +33,49 @@ FILTER_END_DATE   = ""                                  # e.g., "2025-11-01" (in
 
 # ------------------------- Math helpers ---------------------------
 def fisher_z(series: pd.Series) -> pd.Series:
-    r = series.clip(lower=-0.999999, upper=0.999999)
-    return 0.5 * np.log((1.0 + r) / (1.0 - r))
+    # arctanh(r) == 0.5 * log((1 + r) / (1 - r)); one private copy, then in-place ufuncs
+    r = np.array(series, dtype=np.float64)
+    np.clip(r, -0.999999, 0.999999, out=r)
+    np.arctanh(r, out=r)
+    return pd.Series(r, index=series.index, name=series.name)
 
 def fisher_inv(z: float | np.ndarray) -> float | np.ndarray:
     return np.tanh(z)
 
 
 # -------------------- Local price file loaders --------------------
-def load_price_series_from_csv(path: Path) -> pd.Series:
+def resolve_price_file(path: Path) -> Path:
     """
-    Read a local OHLCV CSV saved by your downloader.
+    The file to read for `path` (e.g. price_store/KO.csv): its '.parquet'
+    sibling if present (typed columns, no CSV tokenizing/date parsing), else
+    the '.csv'. Siblings come from the full file name, so dotted tickers
+    like 'BRK.B.csv' map to 'BRK.B.parquet'.
+    """
+    name = path.name
+    if path.suffix in (".csv", ".parquet"):
+        name = name[: -len(path.suffix)]
+    for candidate in (path.with_name(name + ".parquet"), path.with_name(name + ".csv")):
+        if candidate.exists():
+            return candidate
+    raise FileNotFoundError(f"Price file not found: {path.with_name(name + '.csv').resolve()}")
+
+def load_price_series(path: Path) -> pd.Series:
+    """
+    Read a local OHLCV file saved by your downloader.
+    Reads the file chosen by resolve_price_file (Parquet preferred, else CSV).
     Uses 'Adj Close' if present, otherwise 'Close'.
     Returns a price Series indexed by Date (DatetimeIndex).
     """
-    if not path.exists():
-        raise FileNotFoundError(f"Price file not found: {path.resolve()}")
-    df = pd.read_csv(path, parse_dates=["Date"])
+    path = resolve_price_file(path)
+    if path.suffix == ".parquet":
+        df = pd.read_parquet(path)
+        # yfinance frames are saved with (Price, Ticker) column levels
+        if isinstance(df.columns, pd.MultiIndex):
+            df.columns = df.columns.get_level_values(0)
+        dates = df.index
+    else:
+        df = pd.read_csv(path, parse_dates=["Date"])
+        dates = df["Date"]
     if "Adj Close" in df.columns:
         px = df["Adj Close"].astype("float64")
     elif "AdjClose" in df.columns:
@@ -58,7 +84,7 @@ def load_price_series_from_csv(path: Path) -> pd.Series:
         px = df["Close"].astype("float64")
     else:
         raise ValueError(f"{path.name}: expected 'Adj Close' or 'Close' column.")
-    px.index = pd.to_datetime(df["Date"])
+    px.index = pd.to_datetime(dates)
     px = px.sort_index()
     # Optional date filter
     if FILTER_START_DATE:
@@ -81,12 +107,68 @@ def compute_rolling_corr(ret_a: pd.Series, ret_b: pd.Series, window: int) -> pd.
         raise ValueError(
             f"Not enough overlapping data for a {window}-day window (overlap rows={df.shape[0]})."
         )
-    rho = df["a"].rolling(window).corr(df["b"])
+    # O(N) sliding-window Pearson corr from cumulative sums of a, b, a², b², a·b
+    a = df["a"].to_numpy(dtype=np.float64)
+    b = df["b"].to_numpy(dtype=np.float64)
+
+    def window_sums(x: np.ndarray) -> np.ndarray:
+        c = np.concatenate(([0.0], np.cumsum(x)))
+        return c[window:] - c[:-window]
+
+    mean_a = window_sums(a) / window
+    mean_b = window_sums(b) / window
+    var_a = window_sums(a * a) / window - mean_a ** 2
+    var_b = window_sums(b * b) / window - mean_b ** 2
+    cov = window_sums(a * b) / window - mean_a * mean_b
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rho = cov / np.sqrt(var_a * var_b)
+    rho[~np.isfinite(rho)] = np.nan  # flat windows (zero variance) -> NaN, like pandas
+
+    rho = pd.Series(np.clip(rho, -1.0, 1.0), index=df.index[window - 1:])
     return rho.dropna()
 
-def to_quarter_label(dts: pd.DatetimeIndex) -> pd.Series:
-    # Map rolling-window END dates to 'YYYYQ#' (e.g., '2019Q3')
-    return pd.PeriodIndex(dts, freq="Q").astype(str)
+def compute_rolling_corr_pairs(
+    pairs: list[tuple[pd.Series, pd.Series]], window: int
+) -> list[pd.Series]:
+    """
+    Rolling corr for several (ret_a, ret_b) pairs, aligned on the dates where
+    every series has a return. With more than one pair and numba installed,
+    all pairs go through the parallel kernel in rolling_corr_nb.py in one call.
+    """
+    if len(pairs) == 1:
+        return [compute_rolling_corr(*pairs[0], window)]
+
+    cols = {}
+    for i, (ret_a, ret_b) in enumerate(pairs):
+        cols[f"a{i}"] = ret_a
+        cols[f"b{i}"] = ret_b
+    df = pd.concat(cols, axis=1).dropna()
+    if df.shape[0] < window:
+        raise ValueError(
+            f"Not enough overlapping data for a {window}-day window (overlap rows={df.shape[0]})."
+        )
+    a_cols = [f"a{i}" for i in range(len(pairs))]
+    b_cols = [f"b{i}" for i in range(len(pairs))]
+
+    try:
+        from rolling_corr_nb import rolling_corr_batch  # optional: pip install numba
+    except ImportError:
+        return [compute_rolling_corr(df[a], df[b], window) for a, b in zip(a_cols, b_cols)]
+
+    A = np.ascontiguousarray(df[a_cols].to_numpy(dtype=np.float64).T)
+    B = np.ascontiguousarray(df[b_cols].to_numpy(dtype=np.float64).T)
+    rho = rolling_corr_batch(A, B, window)
+    idx = df.index[window - 1:]
+    return [pd.Series(rho[p], index=idx).dropna() for p in range(len(pairs))]
+
+def to_quarter_label(dts: pd.DatetimeIndex) -> np.ndarray:
+    # Map rolling-window END dates to 'YYYYQ#' (e.g., '2019Q3'), built from
+    # integer year/quarter arrays instead of formatting each Period object
+    pi = pd.PeriodIndex(dts, freq="Q")
+    years = pi.year.to_numpy().astype(str)
+    quarters = pi.quarter.to_numpy().astype(str)
+    return np.char.add(np.char.add(years, "Q"), quarters)
 
 def detect_period_column(df: pd.DataFrame) -> str:
     candidates = ["period", "Period", "PERIOD", "quarter", "Quarter", "QUARTER"]
@@ -108,13 +190,16 @@ def main():
 
     # 2) Load local price files and compute daily log returns
     pdir = Path(PRICE_DIR)
-    px_a = load_price_series_from_csv(pdir / FILE_A)
-    px_b = load_price_series_from_csv(pdir / FILE_B)
+    path_a = resolve_price_file(pdir / FILE_A)
+    path_b = resolve_price_file(pdir / FILE_B)
+    px_a = load_price_series(path_a)
+    px_b = load_price_series(path_b)
     ret_a = to_log_returns(px_a)
     ret_b = to_log_returns(px_b)
 
-    # 3) Rolling correlation over full span
-    rho_series = compute_rolling_corr(ret_a, ret_b, ROLLING_WINDOW)
+    # 3) Rolling correlation over full span (one pair -> NumPy path; append
+    #    more (ret_a, ret_b) pairs to batch them through the numba kernel)
+    (rho_series,) = compute_rolling_corr_pairs([(ret_a, ret_b)], ROLLING_WINDOW)
     z_series = fisher_z(rho_series)
 
     # 4) Assign rolling END dates to quarters and aggregate
@@ -127,9 +212,14 @@ def main():
                 n_windows=("rho", "size"))
            .reset_index()
     )
-    grouped["rho_from_mean_z"] = grouped["z_mean"].apply(lambda z: float(fisher_inv(z)))
-
-    # 5) Merge back into your CSV
+    grouped["rho_from_mean_z"] = fisher_inv(grouped["z_mean"].to_numpy())
+
+    # 5) Merge back into your CSV (shared categorical vocabulary -> merge on integer codes)
+    cats = pd.api.types.union_categoricals(
+        [pd.Categorical(base[period_col]), pd.Categorical(grouped["quarter"])]
+    ).categories
+    base[period_col] = pd.Categorical(base[period_col], categories=cats)
+    grouped["quarter"] = pd.Categorical(grouped["quarter"], categories=cats)
     out = base.merge(grouped, left_on=period_col, right_on="quarter", how="left")
     out["co_mov_tickers"] = f"{Path(FILE_A).stem}-{Path(FILE_B).stem}"
     out["rolling_window_days"] = ROLLING_WINDOW
@@ -144,8 +234,8 @@ def main():
 
     print("=" * 78)
     print("Co-movement (rolling Pearson corr of daily log returns) — LOCAL price files")
-    print(f"Prices A file        : {pdir / FILE_A}")
-    print(f"Prices B file        : {pdir / FILE_B}")
+    print(f"Prices A file        : {path_a}")
+    print(f"Prices B file        : {path_b}")
     if FILTER_START_DATE or FILTER_END_DATE:
         print(f"Date filter applied  : {FILTER_START_DATE or 'min'} → {FILTER_END_DATE or 'max'}")
     if eff_start and eff_end:
@@ -3,8 +3,15 @@ import requests
 from bs4 import BeautifulSoup
 import re
 import os
+import shutil
 from urllib.parse import urlparse, unquote
 
+# RFC6266 allows either filename*=UTF-8''urlencoded or filename="..."
+_CD_UTF8 = re.compile(r"filename\*=(?:UTF-8'')?([^;]+)", re.IGNORECASE)
+_CD_PLAIN = re.compile(r'filename="?([^";]+)"?')
+# Characters that are problematic in Windows/posix filenames -> '_'
+_SANITIZE_TABLE = str.maketrans({ch: '_' for ch in '<>:\\"/|?* ,'})
+
 def get_coca_cola_links():
     url = 'https://investors.coca-colacompany.com/financial-information'
     response = requests.get(url)
@@ -52,14 +59,13 @@ def get_sanitized_filename(url, response, parent_folder):
     fname = None
     cd = response.headers.get('content-disposition')
     if cd:
-        # RFC6266 allows either filename*=UTF-8''urlencoded or filename="..."
-        m = re.search(r"filename\*=(?:UTF-8'')?([^;]+)", cd, flags=re.IGNORECASE)
+        m = _CD_UTF8.search(cd)
         if m:
             fname = m.group(1).strip().strip('"')
             # If url-encoded (from filename*), unquote it
             fname = unquote(fname)
         else:
-            m2 = re.search(r'filename="?([^";]+)"?', cd)
+            m2 = _CD_PLAIN.search(cd)
             if m2:
                 fname = m2.group(1).strip()
 
@@ -69,10 +75,7 @@ def get_sanitized_filename(url, response, parent_folder):
         fname = os.path.basename(unquote(path)) or 'downloaded_file'
 
     # Sanitize filename for Windows/posix (remove/replace problematic chars)
-    invalid_chars = '<>:\\"/|?* ,'
-    for ch in invalid_chars:
-        fname = fname.replace(ch, '_')
-    fname = fname.strip()
+    fname = fname.translate(_SANITIZE_TABLE).strip()
 
     out_path = os.path.join(parent_folder, fname)
     return out_path
@@ -114,14 +117,11 @@ def download_file(url, parent_folder):
     content_length = resp.headers.get('content-length')
     print(f"Downloading -> {out_path}  (Content-Type: {content_type}; Content-Length: {content_length})")
 
-    # Stream-write into file
-    written = 0
+    # Stream-write into file (C-level copy loop with 1 MiB buffers)
+    resp.raw.decode_content = True  # undo gzip/deflate transfer encoding like iter_content did
     with open(out_path, 'wb') as file:
-        for chunk in resp.iter_content(chunk_size=8192):
-            if not chunk:
-                continue
-            file.write(chunk)
-            written += len(chunk)
+        shutil.copyfileobj(resp.raw, file, length=1024 * 1024)
+    written = os.path.getsize(out_path)
 
     # Basic sanity checks
     if written == 0:
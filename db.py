@@ -2,6 +2,7 @@ from typing import Iterable
 
 import numpy as np
 import psycopg2
+from psycopg2.extras import execute_values
 from pgvector.psycopg2 import register_vector
 
 from config import DB_DSN
@@ -17,7 +18,7 @@ class VectorStore:
         ticker    text not null,
         doc_id    text not null,
         content   text not null,
-        embedding vector(dim) not null
+        embedding vector(dim) not null   -- float4 (single precision)
       )
     """
 
@@ -46,15 +47,35 @@ class VectorStore:
             );
             """
             cur.execute(create_table_sql)
+            # ANN index is built by create_index() after the bulk insert,
+            # so inserts don't pay per-row index maintenance.
 
-            # Optional: index for similarity search later
-            # (you can uncomment when ready)
-            # cur.execute("""
-            #   CREATE INDEX IF NOT EXISTS idx_document_embeddings_embedding
-            #   ON document_embeddings
-            #   USING ivfflat (embedding vector_cosine_ops)
-            #   WITH (lists = 100);
-            # """)
+    def create_index(self) -> None:
+        """
+        Create the cosine ANN index on embedding (call after bulk insert).
+
+        Uses HNSW when the installed pgvector supports it (>= 0.5.0),
+        otherwise IVFFlat.
+        """
+        with self._conn, self._conn.cursor() as cur:
+            cur.execute("SELECT extversion FROM pg_extension WHERE extname = 'vector';")
+            row = cur.fetchone()
+            version = tuple(int(x) for x in row[0].split(".")[:2]) if row else (0, 0)
+
+            if version >= (0, 5):
+                cur.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_doc_emb_hnsw
+                    ON document_embeddings
+                    USING hnsw (embedding vector_cosine_ops)
+                    WITH (m = 16, ef_construction = 64);
+                """)
+            else:
+                cur.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_document_embeddings_embedding
+                    ON document_embeddings
+                    USING ivfflat (embedding vector_cosine_ops)
+                    WITH (lists = 100);
+                """)
 
     def insert_documents(
         self,
@@ -75,13 +96,22 @@ class VectorStore:
                 f"got {embeddings.shape}"
             )
 
+        # pgvector stores float4 and its adapter (register_vector) takes
+        # ndarrays directly, so cast once and skip per-element .tolist()
+        embeddings = embeddings.astype(np.float32, copy=False)
+        rows = [
+            (ticker, doc_id, text, per, emb)
+            for doc_id, text, per, emb in zip(doc_ids, contents, period, embeddings)
+        ]
+
         with self._conn, self._conn.cursor() as cur:
-            for doc_id, text, period, emb in zip(doc_ids, contents, period, embeddings):
-                # emb is a 1D numpy array; pgvector adapter accepts list-like
-                cur.execute(
-                    """
-                    INSERT INTO document_embeddings (ticker, doc_id, content, period, embedding)
-                    VALUES (%s, %s, %s, %s, %s)
-                    """,
-                    (ticker, doc_id, text, period, emb.tolist()),
-                )
+            # One multi-row INSERT per page instead of one round trip per document
+            execute_values(
+                cur,
+                """
+                INSERT INTO document_embeddings (ticker, doc_id, content, period, embedding)
+                VALUES %s
+                """,
+                rows,
+                page_size=500,
+            )
@@ -1,8 +1,8 @@
 # download_prices.py
 # -----------------------------------------------------------------------------
 # Download daily prices for one or more tickers (default: KO, PEP) from
-# 2001-01-01 to 2025-11-01 and store to disk for future reuse. Saves both
-# CSV and Parquet per ticker: ./price_store/{TICKER}.csv / .parquet
+# 2001-01-01 to 2025-11-01 and store to disk for future reuse. Saves Parquet
+# per ticker (./price_store/{TICKER}.parquet), plus CSV when WRITE_CSV = True.
 #
 # One-time installs:
 #   pip install yfinance pandas-datareader pandas pyarrow
@@ -10,6 +10,7 @@
 
 from __future__ import annotations
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 import pandas as pd
 
@@ -19,6 +20,8 @@ START_DATE   = "2001-01-01"
 END_DATE     = "2025-11-01"           # yfinance 'end' is exclusive
 OUT_DIR      = "price_store"          # folder to save files
 OVERWRITE    = False                  # False = skip if already saved
+MAX_WORKERS  = 8                      # concurrent ticker downloads
+WRITE_CSV    = False                  # True = also write {TICKER}.csv (Parquet is always written)
 # Yahoo retry policy
 MAX_RETRIES      = 5
 BACKOFF_BASE_SEC = 1.0
@@ -105,36 +108,54 @@ def save_ticker(df: pd.DataFrame, ticker: str, out_dir: Path) -> None:
     df = df.copy()
     df.index = pd.to_datetime(df.index)
     df = df.sort_index()
-    # Save CSV
-    csv_path = out_dir / f"{ticker}.csv"
-    df.to_csv(csv_path, index_label="Date", float_format="%.6f")
-    # Save Parquet (fast to read later)
+    # Save Parquet (fast to read later; what comovement_new reads)
     pq_path = out_dir / f"{ticker}.parquet"
     df.to_parquet(pq_path, engine="pyarrow")
+    if not WRITE_CSV:
+        print(f"Saved {ticker}: {pq_path}")
+        return
+    # Save CSV (opt-in: float -> text formatting dominates save time)
+    csv_path = out_dir / f"{ticker}.csv"
+    df.to_csv(csv_path, index_label="Date", float_format="%.6f")
     print(f"Saved {ticker}: {csv_path} and {pq_path}")
 
 
 def already_saved(ticker: str, out_dir: Path) -> bool:
-    return (out_dir / f"{ticker}.csv").exists() and (out_dir / f"{ticker}.parquet").exists()
+    if not (out_dir / f"{ticker}.parquet").exists():
+        return False
+    return not WRITE_CSV or (out_dir / f"{ticker}.csv").exists()
 
 
 def main():
     out_dir = Path(OUT_DIR)
+    pending = []
     for t in TICKERS:
         if not OVERWRITE and already_saved(t, out_dir):
             print(f"Skipping {t} (already saved). Set OVERWRITE=True to refresh.")
             continue
-        print(f"Downloading {t} {START_DATE} → {END_DATE} ...")
-        df = load_prices(t, START_DATE, END_DATE)
-        # Optional sanity checks
-        if df.empty:
-            print(f"WARNING: {t} returned empty data. Skipping save.")
-            continue
-        # Ensure expected columns are present
-        missing = [c for c in ["Open", "High", "Low", "Close", "Adj Close", "Volume"] if c not in df.columns]
-        if missing:
-            raise RuntimeError(f"{t} missing columns: {missing}")
-        save_ticker(df, t, out_dir)
+        pending.append(t)
+    if not pending:
+        print("Done.")
+        return
+
+    # Downloads are network-bound: fetch tickers concurrently, save as each lands
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(pending))) as ex:
+        futs = {}
+        for t in pending:
+            print(f"Downloading {t} {START_DATE} → {END_DATE} ...")
+            futs[ex.submit(load_prices, t, START_DATE, END_DATE)] = t
+        for fut in as_completed(futs):
+            t = futs[fut]
+            df = fut.result()
+            # Optional sanity checks
+            if df.empty:
+                print(f"WARNING: {t} returned empty data. Skipping save.")
+                continue
+            # Ensure expected columns are present
+            missing = [c for c in ["Open", "High", "Low", "Close", "Adj Close", "Volume"] if c not in df.columns]
+            if missing:
+                raise RuntimeError(f"{t} missing columns: {missing}")
+            save_ticker(df, t, out_dir)
     print("Done.")
 
 
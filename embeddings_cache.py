@@ -0,0 +1,95 @@
+from functools import lru_cache
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+TRANSCRIPTS_CSV = "transcripts_clean.csv"
+DOC_EMB_CSV = "document_embeddings.csv"
+
+
+def read_csv_columns(path, columns) -> pd.DataFrame:
+    """
+    Read only `columns` of a CSV as string[pyarrow] with the multithreaded
+    pyarrow CSV reader (quoted fields may span lines; empty fields are null).
+    """
+    from pyarrow import csv as pa_csv
+    import pyarrow as pa
+
+    table = pa_csv.read_csv(
+        path,
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=list(columns),
+            column_types={c: pa.string() for c in columns},
+            strings_can_be_null=True,
+        ),
+    )
+    return table.to_pandas(types_mapper={pa.string(): pd.StringDtype("pyarrow")}.get)
+
+
+def parse_emb(s: str) -> np.ndarray:
+    """Parse a stringified '[x,y,...]' embedding with NumPy's C parser."""
+    return np.fromstring(s.strip()[1:-1], sep=",", dtype=np.float32)
+
+
+def load_embeddings(csv_path) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return (doc_ids, vecs) for every row of the embeddings CSV that has an embedding.
+
+    The first call parses the CSV and writes two siblings: `<stem>.vecs.npy`,
+    the contiguous float16 (N, d) matrix, and `<stem>.ids.parquet`, the doc_ids
+    in matrix row order. Later calls memory-map the matrix (pages are read
+    only when touched) instead of reparsing. The cache is rebuilt whenever
+    the CSV is newer than it.
+
+    float16 halves the bytes moved by every load/gather; callers should
+    accumulate and take dot products in float32 (or wider).
+    """
+    csv_path = Path(csv_path)
+    vecs_path = csv_path.with_suffix(".vecs.npy")
+    ids_path = csv_path.with_suffix(".ids.parquet")
+
+    csv_mtime = csv_path.stat().st_mtime
+    if all(p.exists() and p.stat().st_mtime >= csv_mtime for p in (vecs_path, ids_path)):
+        ids = pd.read_parquet(ids_path)["doc_id"].to_numpy(dtype=str)
+        return ids, np.load(vecs_path, mmap_mode="r")
+
+    docs = read_csv_columns(csv_path, ["doc_id", "embedding"])
+    docs = docs[docs["embedding"].notna()]
+
+    ids = docs["doc_id"].to_numpy(dtype=str)
+    vecs = np.stack([parse_emb(s) for s in docs["embedding"]]).astype(np.float16)
+
+    np.save(vecs_path, vecs)
+    pd.DataFrame({"doc_id": ids}).to_parquet(ids_path, index=False)
+    return ids, vecs
+
+
+@lru_cache(maxsize=1)
+def load_merged(
+    transcripts_csv: str = TRANSCRIPTS_CSV, doc_emb_csv: str = DOC_EMB_CSV
+) -> Tuple[pd.DataFrame, np.ndarray]:
+    """
+    Return (merged, vecs): the transcript metadata rows that have an embedding
+    (matched on the lowercased file name), and the (N, d) float16 matrix that
+    merged["emb_row"] indexes into. Only the source_file, ticker and period
+    columns are read, as string[pyarrow].
+
+    Cached per process so scripts/REPL sessions read the CSVs once; treat the
+    returned frame as read-only.
+    """
+    meta = read_csv_columns(transcripts_csv, ["source_file", "ticker", "period"])
+    doc_ids, vecs = load_embeddings(doc_emb_csv)
+    # Hash lookup lowercased doc_id -> matrix row instead of a join; no
+    # join intermediate is built. Arrow-backed strings make .str.lower()
+    # a vectorized kernel rather than a per-object Python loop.
+    lowered_ids = pd.Index(doc_ids, dtype="string[pyarrow]").str.lower()
+    id_to_row = dict(zip(lowered_ids, range(len(lowered_ids))))
+    source_file_clean = meta["source_file"].str.lower()
+    emb_row = source_file_clean.map(id_to_row)
+
+    found = emb_row.notna().to_numpy()
+    merged = meta[found].assign(emb_row=emb_row[found].astype(np.intp).to_numpy())
+    return merged, vecs
@@ -1,59 +1,50 @@
 import pandas as pd
 import numpy as np
-import ast
-from sklearn.metrics.pairwise import cosine_similarity
+
+from embeddings_cache import load_merged
 
 TRANSCRIPTS_CSV = "transcripts_clean.csv"
 DOC_EMB_CSV = "document_embeddings.csv"
 OUT_CSV = "ko_pep_similarity_by_period.csv"
 
 
-def parse_emb(s: str) -> np.ndarray:
-    return np.array(ast.literal_eval(s), dtype=float)
-
-
 def main():
-    meta = pd.read_csv(TRANSCRIPTS_CSV)
-    docs = pd.read_csv(DOC_EMB_CSV)
+    merged, emb_mat = load_merged(TRANSCRIPTS_CSV, DOC_EMB_CSV)
 
-    meta["source_file_clean"] = meta["source_file"].str.lower()
-    docs["doc_id_clean"] = docs["doc_id"].str.lower()
+    merged = merged[merged["period"].notna()]
 
-    merged = meta.merge(
-        docs, left_on="source_file_clean", right_on="doc_id_clean", how="inner"
+    # Per-(period, ticker) mean vectors in one scatter-add over the (N, d) matrix
+    vecs = emb_mat[merged["emb_row"].to_numpy()]
+    codes, groups = pd.factorize(
+        pd.MultiIndex.from_arrays([merged["period"], merged["ticker"]])
+    )
+    sums = np.zeros((len(groups), vecs.shape[1]), dtype=np.float32)  # fp16 in, fp32 sums
+    np.add.at(sums, codes, vecs)
+    counts = np.bincount(codes, minlength=len(groups))
+    means = sums / counts[:, None]
+    group_row = {key: i for i, key in enumerate(groups)}
+
+    # Only periods where we have both KO and PEP
+    periods = sorted(
+        p for p in {p for p, _ in groups}
+        if (p, "KO") in group_row and (p, "PEP") in group_row
+    )
+    ko_mat = means[[group_row[(p, "KO")] for p in periods]]
+    pep_mat = means[[group_row[(p, "PEP")] for p in periods]]
+
+    # Cosine for every period at once: normalize rows, then row-wise dot products
+    ko_n = ko_mat / np.linalg.norm(ko_mat, axis=1, keepdims=True)
+    pep_n = pep_mat / np.linalg.norm(pep_mat, axis=1, keepdims=True)
+    sims = np.einsum("pd,pd->p", ko_n, pep_n)
+
+    out_df = pd.DataFrame(
+        {
+            "period": periods,
+            "ticker1": "KO",
+            "ticker2": "PEP",
+            "cosine_similarity": sims,
+        }
     )
-
-    merged = merged[merged["embedding"].notna()].copy()
-
-    merged["vec"] = merged["embedding"].apply(parse_emb)
-
-    rows = []
-    for period, sub in merged.groupby("period"):
-        tickers = set(sub["ticker_x"].unique())
-        # Only periods where we have both KO and PEP
-        if not {"KO", "PEP"}.issubset(tickers):
-            continue
-
-        firm_vecs = {}
-        for t in ["KO", "PEP"]:
-            vecs = np.vstack(sub[sub["ticker_x"] == t]["vec"].values)
-            firm_vecs[t] = vecs.mean(axis=0)
-
-        sim = cosine_similarity(
-            firm_vecs["KO"].reshape(1, -1),
-            firm_vecs["PEP"].reshape(1, -1),
-        )[0, 0]
-
-        rows.append(
-            {
-                "period": period,
-                "ticker1": "KO",
-                "ticker2": "PEP",
-                "cosine_similarity": sim,
-            }
-        )
-
-    out_df = pd.DataFrame(rows).sort_values("period")
     out_df.to_csv(OUT_CSV, index=False)
 
     print("Done. Saved firm-level similarity to", OUT_CSV)
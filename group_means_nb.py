@@ -0,0 +1,30 @@
+# group_means_nb.py
+# -----------------------------------------------------------------------------
+# Numba kernel that scatter-adds embedding rows into per-group sums and counts
+# in one fused pass (used for the per-(period, ticker) mean vectors).
+# Threads split the embedding dimensions, so each one owns whole columns of
+# `sums` and no two threads ever write the same cell.
+#
+# One-time install:
+#   pip install numba
+# -----------------------------------------------------------------------------
+
+import numpy as np
+from numba import njit, prange
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def accumulate_group_sums(
+    codes: np.ndarray, vecs: np.ndarray, sums: np.ndarray, counts: np.ndarray
+) -> None:
+    """
+    codes: (N,) int64 group id per row; vecs: (N, D) float32 rows.
+    Adds row i into sums[codes[i]] (sums: (G, D) float32) and increments
+    counts[codes[i]] (counts: (G,) int64), both in place.
+    """
+    N, D = vecs.shape
+    for d in prange(D):
+        for i in range(N):
+            sums[codes[i], d] += vecs[i, d]
+    for i in range(N):
+        counts[codes[i]] += 1
@@ -1,43 +1,27 @@
-import ast
 import numpy as np
-import pandas as pd
 import matplotlib.pyplot as plt
 from sklearn.metrics.pairwise import cosine_similarity
 
+from embeddings_cache import load_merged
+
 TRANSCRIPTS_CSV = "transcripts_clean.csv"
 DOC_EMB_CSV = "document_embeddings.csv"
 
 TARGET_PERIOD = "2020Q2"
 
 
-def parse_emb(s: str) -> np.ndarray:
-    return np.array(ast.literal_eval(s), dtype=float)
-
-
 def build_firm_vectors_for_period(period: str):
-    meta = pd.read_csv(TRANSCRIPTS_CSV)
-    docs = pd.read_csv(DOC_EMB_CSV)
+    merged, emb_mat = load_merged(TRANSCRIPTS_CSV, DOC_EMB_CSV)
 
-    meta["source_file_clean"] = meta["source_file"].str.lower()
-    docs["doc_id_clean"] = docs["doc_id"].str.lower()
-
-    merged = meta.merge(
-        docs,
-        left_on="source_file_clean",
-        right_on="doc_id_clean",
-        how="inner"
-    )
-
-    sub = merged[(merged["period"] == period) & merged["embedding"].notna()].copy()
+    sub = merged[merged["period"].eq(period).fillna(False)]
     if sub.empty:
         raise ValueError(f"No documents found for period {period!r}")
 
-    sub["vec"] = sub["embedding"].apply(parse_emb)
-
+    # Gather each firm's rows straight from the cached matrix
     firm_vectors = {}
-    for ticker, group in sub.groupby("ticker_x"):
-        mat = np.vstack(group["vec"].values)
-        firm_vectors[ticker] = mat.mean(axis=0)
+    for ticker, group in sub.groupby("ticker"):
+        rows = emb_mat[group["emb_row"].to_numpy()]
+        firm_vectors[ticker] = rows.astype(np.float32).mean(axis=0)  # fp16 cache -> fp32 math
 
     firms = sorted(firm_vectors.keys())
     vecs = np.vstack([firm_vectors[f] for f in firms])
@@ -60,12 +44,11 @@ def plot_firm_similarity_heatmap(period: str):
     ax.set_yticklabels(firms)
     plt.setp(ax.get_xticklabels(), rotation=45, ha="right")
 
-    for i in range(len(firms)):
-        for j in range(len(firms)):
-            ax.text(
-                j, i, f"{sim_mat[i, j]:.2f}",
-                ha="center", va="center", color="white" if sim_mat[i,j] < 0.5 else "black"
-            )
+    # Label text and contrast color for every cell, computed up front
+    labels = np.char.mod("%.2f", sim_mat)
+    colors = np.where(sim_mat < 0.5, "white", "black")
+    for (i, j), label in np.ndenumerate(labels):
+        ax.text(j, i, label, ha="center", va="center", color=colors[i, j])
 
     ax.set_title(f"Firm-Level Narrative Similarity — {period}")
     fig.colorbar(im, ax=ax, label="Cosine similarity")
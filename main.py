@@ -24,6 +24,9 @@ def main():
 
         print("Storing embeddings in Postgres...")
         store_embeddings(store, docs, embeddings)
+
+        print("Building similarity index...")
+        store.create_index()
     finally:
         store.close()
 
@@ -1,10 +1,15 @@
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterator, List
+from typing import Iterator, List, Tuple
 
 from pypdf import PdfReader
 import re
 
+# Period label, e.g. 'Q3 2019'
+_PERIOD_RE = re.compile(r'Q[1-4] \d{4}')
+
+
 @dataclass
 class Document:
     ticker: str
@@ -16,19 +21,19 @@ class Document:
 def extract_text_from_pdf(path: Path) -> str:
     """Extract plain text from a PDF file using pypdf."""
     reader = PdfReader(str(path))
-    pages_text: List[str] = []
-    for page in reader.pages:
-        # .extract_text() can return None sometimes; guard it
-        page_text = page.extract_text() or ""
-        pages_text.append(page_text)
-    return "\n".join(pages_text)
+    # .extract_text() can return None sometimes; guard it
+    return "\n".join((page.extract_text() or "") for page in reader.pages)
 
 
 def iter_documents(root_dir: Path) -> Iterator[Document]:
     """
     Walk data/{TICKER}/ and yield Document objects
     for every PDF file found.
+
+    Text extraction is CPU-bound, so PDFs are parsed across a process pool;
+    Documents are still yielded in sorted (ticker, filename) order.
     """
+    pairs: List[Tuple[str, Path]] = []
     for ticker_dir in sorted(root_dir.iterdir()):
         if not ticker_dir.is_dir():
             continue
@@ -36,15 +41,24 @@ def iter_documents(root_dir: Path) -> Iterator[Document]:
         ticker = ticker_dir.name.upper()
 
         for pdf_path in sorted(ticker_dir.glob("*.pdf")):
-            text = extract_text_from_pdf(pdf_path)
+            pairs.append((ticker, pdf_path))
+
+    if not pairs:
+        return
+
+    with ProcessPoolExecutor() as ex:
+        texts = ex.map(extract_text_from_pdf, [p for _, p in pairs], chunksize=4)
+        for (ticker, pdf_path), text in zip(pairs, texts):
             if not text.strip():
                 # Optionally skip empty PDFs
                 continue
 
+            #Period is first instance of Q# #### in text
+            m = _PERIOD_RE.search(text)
+
             yield Document(
                 ticker=ticker,
                 doc_id=pdf_path.name,
                 text=text,
-                #Period is first instance of Q# #### in text
-                period = re.search(r'(Q[1-4] \d{4})', text).group(0) if re.search(r'(Q[1-4] \d{4})', text) else ""
+                period=m.group(0) if m else "",
             )
@@ -1,10 +1,9 @@
 from collections import defaultdict
 from typing import Dict, List
-import numpy as np
 
 from config import DATA_DIR, TFIDF_FALLBACK_DIM
 from pdf_reader import iter_documents, Document
-from vectorizer import get_vectorizer, BaseVectorizer   # <-- factory with fallback
+from vectorizer import get_vectorizer, BaseVectorizer, Embeddings, to_dense   # <-- factory with fallback
 from db import VectorStore
 
 def build_corpus() -> List[Document]:
@@ -18,12 +17,12 @@ def fit_vectorizer(docs: List[Document]) -> BaseVectorizer:
     vec.fit(texts)  # no-op for finance; trains vocab for TF–IDF
     return vec
 
-def embed_documents(vec: BaseVectorizer, docs: List[Document]) -> np.ndarray:
+def embed_documents(vec: BaseVectorizer, docs: List[Document]) -> Embeddings:
     """Transform all documents into embeddings."""
     texts = [d.text for d in docs]
     return vec.transform(texts)
 
-def store_embeddings(store: VectorStore, docs: List[Document], embeddings: np.ndarray) -> None:
+def store_embeddings(store: VectorStore, docs: List[Document], embeddings: Embeddings) -> None:
     """Persist all embeddings to the vector DB, grouped by ticker for convenience."""
     ticker_to_indices: Dict[str, List[int]] = defaultdict(list)
     for idx, doc in enumerate(docs):
@@ -35,7 +34,8 @@ def store_embeddings(store: VectorStore, docs: List[Document], embeddings: np.nd
         contents = [d.text for d in sub_docs]
         periods = [d.period for d in sub_docs]  # assuming Document has 'period' attribute
         
-        sub_embeddings = embeddings[indices, :]
+        # pgvector columns are dense; densify one ticker's rows at a time
+        sub_embeddings = to_dense(embeddings[indices, :])
         store.insert_documents(
             ticker=ticker,
             doc_ids=doc_ids,
@@ -0,0 +1,60 @@
+# rolling_corr_nb.py
+# -----------------------------------------------------------------------------
+# Numba kernel for rolling Pearson correlation over many return pairs at once.
+# Each pair keeps running sums (Sa, Sb, Saa, Sbb, Sab) that are updated as the
+# window slides (add the entering element, subtract the leaving one), and pairs
+# are spread across cores with prange.
+#
+# One-time install:
+#   pip install numba
+# -----------------------------------------------------------------------------
+
+import numpy as np
+from numba import njit, prange
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def rolling_corr_batch(A: np.ndarray, B: np.ndarray, window: int) -> np.ndarray:
+    """
+    A, B: (P, N) float64 return arrays, row p is pair p, no NaNs.
+    Returns (P, N - window + 1) rolling correlations; entry t is the window
+    ending at column t + window - 1. Zero-variance windows are NaN.
+    """
+    P, N = A.shape
+    M = N - window + 1
+    out = np.empty((P, M))
+    for p in prange(P):
+        Sa = 0.0
+        Sb = 0.0
+        Saa = 0.0
+        Sbb = 0.0
+        Sab = 0.0
+        for t in range(N):
+            a = A[p, t]
+            b = B[p, t]
+            Sa += a
+            Sb += b
+            Saa += a * a
+            Sbb += b * b
+            Sab += a * b
+            if t >= window:
+                a0 = A[p, t - window]
+                b0 = B[p, t - window]
+                Sa -= a0
+                Sb -= b0
+                Saa -= a0 * a0
+                Sbb -= b0 * b0
+                Sab -= a0 * b0
+            if t >= window - 1:
+                mean_a = Sa / window
+                mean_b = Sb / window
+                var_a = Saa / window - mean_a * mean_a
+                var_b = Sbb / window - mean_b * mean_b
+                cov = Sab / window - mean_a * mean_b
+                denom = var_a * var_b
+                if denom > 0.0:
+                    rho = cov / np.sqrt(denom)
+                    out[p, t - window + 1] = min(1.0, max(-1.0, rho))
+                else:
+                    out[p, t - window + 1] = np.nan
+    return out
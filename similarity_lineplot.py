@@ -1,71 +1,78 @@
-import ast
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
-from sklearn.metrics.pairwise import cosine_similarity
+
+from embeddings_cache import load_merged
 
 
 TRANSCRIPTS_CSV = "transcripts_clean.csv"
 DOC_EMB_CSV = "document_embeddings.csv"
 
 
-def parse_emb(s: str) -> np.ndarray:
-    return np.array(ast.literal_eval(s), dtype=float)
-
-
 def compute_similarity_timeseries():
-    meta = pd.read_csv(TRANSCRIPTS_CSV)
-    docs = pd.read_csv(DOC_EMB_CSV)
-
-    meta["source_file_clean"] = meta["source_file"].str.lower()
-    docs["doc_id_clean"] = docs["doc_id"].str.lower()
-
-    merged = meta.merge(
-        docs,
-        left_on="source_file_clean",
-        right_on="doc_id_clean",
-        how="inner"
-    )
-    merged = merged[merged["embedding"].notna()].copy()
-    merged["vec"] = merged["embedding"].apply(parse_emb)
-
-    rows = []
-
-    for period, group in merged.groupby("period"):
-        tickers = group["ticker_x"].unique()
-
-        if not {"KO", "PEP"}.issubset(set(tickers)):
-            continue
-
-        def avg_vec(ticker):
-            subset = group[group["ticker_x"] == ticker]["vec"].values
-            return np.vstack(subset).mean(axis=0)
-
-        ko_vec = avg_vec("KO")
-        pep_vec = avg_vec("PEP")
-
-        sim = cosine_similarity(ko_vec.reshape(1, -1), pep_vec.reshape(1, -1))[0, 0]
-
-        rows.append({"period": period, "similarity": sim})
-
-    df = pd.DataFrame(rows)
-
-    df = df.sort_values("period")
+    # Cached join of transcript metadata onto the (N, D) embedding matrix;
+    # merged["emb_row"] is the integer row of each document's vector
+    merged, vecs = load_merged(TRANSCRIPTS_CSV, DOC_EMB_CSV)
+
+    # Drop non-KO/PEP rows before any grouping work
+    merged = merged[merged["ticker"].isin(("KO", "PEP")) & merged["period"].notna()]
+
+    # Categorical keys: the integer codes index a dense (period, ticker) grid
+    # directly, so no string hashing / factorize pass is needed
+    period = merged["period"].astype("category")
+    ticker = pd.Categorical(merged["ticker"], categories=["KO", "PEP"])
+    p_codes = period.cat.codes.to_numpy()
+    t_codes = ticker.codes
+
+    # Per-(period, ticker) mean vectors in one scatter-add
+    n_periods, dim = len(period.cat.categories), vecs.shape[1]
+    rows = vecs[merged["emb_row"].to_numpy()]
+    sums = np.zeros((n_periods, 2, dim), dtype=np.float32)  # fp16 in, fp32 sums
+    counts = np.zeros((n_periods, 2), dtype=np.int64)
+    try:
+        from group_means_nb import accumulate_group_sums  # optional: pip install numba
+    except ImportError:
+        np.add.at(sums, (p_codes, t_codes), rows)
+        np.add.at(counts, (p_codes, t_codes), 1)
+    else:
+        # Fused parallel pass over the flattened (period, ticker) grid
+        flat_codes = p_codes.astype(np.int64) * 2 + t_codes
+        accumulate_group_sums(
+            flat_codes, rows.astype(np.float32), sums.reshape(-1, dim), counts.reshape(-1)
+        )
+
+    # Only periods where we have both KO and PEP -> (n_periods, 2, D) tensor
+    both = (counts > 0).all(axis=1)
+    periods = period.cat.categories[both]  # categories are sorted
+    pair_means = sums[both] / counts[both][:, :, None]
+
+    # Cosine for every period at once: normalize rows, then row-wise dot products
+    ko_mat, pep_mat = pair_means[:, 0], pair_means[:, 1]
+    ko_n = ko_mat / np.linalg.norm(ko_mat, axis=1, keepdims=True)
+    pep_n = pep_mat / np.linalg.norm(pep_mat, axis=1, keepdims=True)
+    sims = np.einsum("ij,ij->i", ko_n, pep_n)
+
+    df = pd.DataFrame({"period": periods, "similarity": sims})
 
     return df
 
 
-def plot_similarity(df):
-    plt.figure(figsize=(10, 5))
-    plt.plot(df["period"], df["similarity"], marker="o", linewidth=2)
+def plot_similarity(df, show=True):
+    # Returns the figure; show=False skips plt.show() (e.g. to savefig headless)
+    fig, ax = plt.subplots(figsize=(10, 5))
+    periods = df["period"].to_numpy()
+    sims = df["similarity"].to_numpy()
+    ax.plot(periods, sims, marker="o", linewidth=2)
 
-    plt.xticks(rotation=45)
-    plt.ylabel("Cosine Similarity (KO vs PEP)")
-    plt.title("KO–PEP Narrative Similarity Over Time")
-    plt.grid(alpha=0.3)
+    ax.tick_params(axis="x", rotation=45)
+    ax.set_ylabel("Cosine Similarity (KO vs PEP)")
+    ax.set_title("KO–PEP Narrative Similarity Over Time")
+    ax.grid(alpha=0.3)
 
-    plt.tight_layout()
-    plt.show()
+    fig.tight_layout()
+    if show:
+        plt.show()
+    return fig
 
 
 if __name__ == "__main__":
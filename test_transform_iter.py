@@ -0,0 +1,21 @@
+import numpy as np
+from vectorizer import FinanceEmbeddingVectorizer
+
+def main():
+    # Streaming and list encodes must agree for the same texts
+    texts = [
+        "Unit case volume grew 2% in the quarter.",
+        "We reaffirm our full-year guidance.",
+        "Organic revenue growth was driven by price/mix.",
+    ] * 20
+    v = FinanceEmbeddingVectorizer()
+    streamed = np.vstack(list(v.transform_iter(iter(texts))))
+    listed = v.transform(texts)
+    print("Shapes:", streamed.shape, listed.shape)
+    print("Max abs diff:", float(np.abs(streamed - listed).max()))
+    if streamed.shape != listed.shape or not np.allclose(streamed, listed, atol=1e-3):
+        raise SystemExit("transform_iter does not match transform()")
+    print("transform_iter matches transform().")
+
+if __name__ == "__main__":
+    main()
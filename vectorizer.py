@@ -1,7 +1,17 @@
 from __future__ import annotations
+import os
+import warnings
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from pathlib import Path
+from itertools import islice
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 import numpy as np
+from scipy import sparse
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+Embeddings = Union[np.ndarray, sparse.csr_matrix]
 
 # ================= Base interface =================
 class BaseVectorizer(ABC):
@@ -9,7 +19,7 @@ class BaseVectorizer(ABC):
     @abstractmethod
     def fit(self, texts: List[str]) -> None: ...
     @abstractmethod
-    def transform(self, texts: List[str]) -> np.ndarray: ...
+    def transform(self, texts: List[str]) -> Embeddings: ...
     @property
     @abstractmethod
     def dim(self) -> int: ...
@@ -21,27 +31,104 @@ class TfidfVectorizerWrapper(BaseVectorizer):
     """Fixed-dimension TF–IDF; used as a safe fallback."""
     def __init__(self, max_features: int = 512):
         self._max_features = max_features
-        self._vectorizer = TfidfVectorizer(max_features=max_features, stop_words="english")
+        self._vectorizer = TfidfVectorizer(
+            max_features=max_features, stop_words="english", dtype=np.float32
+        )
         self._fitted = False
     def fit(self, texts: List[str]) -> None:
         self._vectorizer.fit(texts); self._fitted = True
-    def transform(self, texts: List[str]) -> np.ndarray:
+    def transform(self, texts: List[str]) -> sparse.csr_matrix:
+        """Sparse float32 CSR (TF–IDF rows are mostly zeros); see to_dense()."""
         if not self._fitted:
             raise RuntimeError("Vectorizer must be fitted before transform()")
-        return self._vectorizer.transform(texts).toarray().astype("float32")
+        return self._vectorizer.transform(texts)
     @property
     def dim(self) -> int: return self._max_features
 
 # ================= Finance-domain embeddings (lazy import) =================
+_THREADS_CONFIGURED = False
+
+
+def _configure_cpu_threads() -> None:
+    """
+    One-time torch CPU threading for a single-model encode workload:
+    min(8, cores) intra-op threads and 1 inter-op thread (4–8 threads is the
+    usual sweet spot). Only runs on the first CPU instantiation, so later
+    instances don't clobber user settings. If the caller also parallelizes
+    with joblib/multiprocessing, set torch threads yourself to avoid
+    oversubscription.
+    """
+    global _THREADS_CONFIGURED
+    if _THREADS_CONFIGURED:
+        return
+    _THREADS_CONFIGURED = True
+    import torch
+    torch.set_num_threads(min(8, os.cpu_count() or 1))
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # can only be set before any inter-op parallel work has started
+
+def _select_device() -> str:
+    """Best available torch device: CUDA, then Apple MPS, else CPU."""
+    import torch
+    if torch.cuda.is_available():
+        return "cuda"
+    mps = getattr(torch.backends, "mps", None)
+    if mps is not None and mps.is_available():
+        return "mps"
+    return "cpu"
+
+# Loaded models shared across instances: (model_name, requested device) -> (model, device)
+_MODEL_CACHE: Dict[Tuple[str, str], Tuple["SentenceTransformer", str]] = {}
+
+
+def _load_sentence_transformer(SentenceTransformer, model_name: str, device: str):
+    """
+    Load (once per process) `model_name` onto `device`; returns (model, device).
+    Falls back to CPU if the model can't be moved to `device`. Weights load
+    from safetensors when available, which the OS maps in lazily.
+    """
+    key = (model_name, device)
+    if key in _MODEL_CACHE:
+        return _MODEL_CACHE[key]
+
+    try:
+        model = SentenceTransformer(model_name, model_kwargs={"use_safetensors": True})
+    except (TypeError, OSError):  # sentence-transformers < 3.0, or repo has only .bin weights
+        model = SentenceTransformer(model_name)
+    try:
+        model = model.to(device)
+    except Exception as e:
+        warnings.warn(f"FinanceEmbeddingVectorizer: could not move model to {device!r} ({e}); using CPU.")
+        device = "cpu"
+        model = model.to(device)
+
+    if device == "cuda":
+        # Inference only: FP16 weights/activations, fused attention kernels
+        import torch
+        torch.set_float32_matmul_precision("high")
+        model = model.half()
+        try:
+            first = model._first_module()
+            first.auto_model = first.auto_model.to_bettertransformer()
+        except Exception:
+            pass  # needs `optimum`; recent transformers already use SDPA
+
+    _MODEL_CACHE[key] = (model, device)
+    return model, device
+
+
 class FinanceEmbeddingVectorizer(BaseVectorizer):
     """
     Finance sentence embeddings via SentenceTransformers (default ~768-d).
     Lazy-imports to avoid Windows DLL errors on import. If unavailable, raise cleanly.
+    The loaded model is cached per (model_name, device) and shared by instances.
     """
     def __init__(
         self,
         model_name: str = "FinLang/finance-embeddings-investopedia",
-        device: Optional[str] = None,    # "cpu" | "cuda" | None
+        device: Optional[str] = None,    # "cpu" | "cuda" | "mps" | None (auto)
         normalize: bool = True,
         batch_size: int = 32,
     ):
@@ -56,10 +143,18 @@ class FinanceEmbeddingVectorizer(BaseVectorizer):
                 "  pip install sentence-transformers"
             ) from e
 
-        self.model = SentenceTransformer(model_name)
-        if device:
-            try: self.model = self.model.to(device)
-            except Exception: pass
+        if device is None:
+            device = _select_device()
+            if device == "cpu":
+                warnings.warn(
+                    "FinanceEmbeddingVectorizer: no CUDA/MPS device found; "
+                    "encoding on CPU will be much slower."
+                )
+        self.model, device = _load_sentence_transformer(SentenceTransformer, model_name, device)
+        self._device = device
+        if device == "cpu":
+            _configure_cpu_threads()
+
         self._dim = self.model.get_sentence_embedding_dimension()
         self._normalize = normalize
         self._batch_size = batch_size
@@ -74,19 +169,253 @@ class FinanceEmbeddingVectorizer(BaseVectorizer):
             raise RuntimeError("Vectorizer must be fitted before transform()")
         if not texts:
             return np.empty((0, self._dim), dtype="float32")
-        emb = self.model.encode(
-            texts,
-            batch_size=self._batch_size,
-            convert_to_numpy=True,
-            normalize_embeddings=self._normalize,
-            show_progress_bar=False,
+        # Encode each distinct text once (transcripts repeat boilerplate),
+        # then scatter back to every position via the inverse index.
+        unique, inverse = np.unique(np.array(texts, dtype=object), return_inverse=True)
+        # Smart batching: encode in length order so each batch pads to similar
+        # lengths, then restore input order. (Recent sentence-transformers
+        # also sort internally; doing it here covers older versions.)
+        lens = np.fromiter((len(t) for t in unique), dtype=np.int64, count=len(unique))
+        order = np.argsort(lens, kind="stable")
+        import torch
+        with torch.inference_mode():  # no autograd bookkeeping
+            emb = self.model.encode(
+                [unique[i] for i in order],
+                batch_size=self._batch_size,
+                device=self._device,
+                convert_to_numpy=True,
+                normalize_embeddings=self._normalize,
+                show_progress_bar=False,
+            )
+        inv = np.empty_like(order)
+        inv[order] = np.arange(len(order))
+        return emb[inv[inverse.ravel()]].astype("float32")
+
+    def transform_iter(self, texts_iter: Iterable[str], prefetch: int = 2) -> Iterator[np.ndarray]:
+        """
+        Streaming encode: yields one (batch, dim) float32 array per batch, in
+        input order, without materializing the corpus. Batches are pulled from
+        `texts_iter` once, in this thread (one-shot generators are safe); one
+        background thread tokenizes up to `prefetch` batches ahead (fast
+        tokenizers release the GIL) while the model encodes the current one. On CUDA, tokenized batches are pinned for async host->GPU copies.
+        Batches go through the full SentenceTransformer module stack (its
+        configured Pooling/Dense/Normalize), so results match transform().
+        """
+        if not self._fitted:
+            raise RuntimeError("Vectorizer must be fitted before transform_iter()")
+        from collections import deque
+        from concurrent.futures import ThreadPoolExecutor
+        import torch
+        from sentence_transformers.models import Normalize
+
+        pin = self._device == "cuda"
+        stack_normalizes = any(isinstance(m, Normalize) for m in self.model)
+
+        def tokenize(batch: List[str]):
+            features = self.model.tokenize(batch)
+            if pin:
+                features = {k: v.pin_memory() for k, v in features.items()}
+            return features
+
+        it = iter(texts_iter)
+        pending = deque()
+        # A single worker: HF fast tokenizers are not safe to call concurrently
+        with ThreadPoolExecutor(max_workers=1) as ex, torch.inference_mode():
+            while True:
+                # Keep up to `prefetch` batches tokenizing ahead of the model
+                while len(pending) < max(1, prefetch):
+                    batch = list(islice(it, self._batch_size))
+                    if not batch:
+                        break
+                    pending.append(ex.submit(tokenize, batch))
+                if not pending:
+                    return
+                features = pending.popleft().result()
+                features = {k: v.to(self._device, non_blocking=True) for k, v in features.items()}
+                emb = self.model(features)["sentence_embedding"].float()
+                if self._normalize and not stack_normalizes:
+                    emb = torch.nn.functional.normalize(emb, p=2, dim=1)
+                yield emb.cpu().numpy().astype("float32")
+
+    @property
+    def dim(self) -> int: return self._dim
+
+# ================= Finance embeddings on ONNX Runtime (CPU, lazy import) =================
+_SUPPORTED_ST_MODULES = {
+    "sentence_transformers.models.Transformer",
+    "sentence_transformers.models.Pooling",
+    "sentence_transformers.models.Normalize",
+}
+
+
+def _read_st_config(model_name: str, filename: str):
+    """Load a JSON file from a SentenceTransformer repo (local dir or Hub)."""
+    import json
+    local = Path(model_name) / filename
+    if local.is_file():
+        path = local
+    else:
+        from huggingface_hub import hf_hub_download
+        path = hf_hub_download(model_name, filename)
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+# SentenceTransformer Pooling flags the ONNX path reproduces -> our pooling mode
+_POOLING_MODES = {"pooling_mode_mean_tokens": "mean", "pooling_mode_cls_token": "cls"}
+_POOLING_FILE = "st_pooling.json"  # written next to the ONNX export
+
+
+def _read_pooling_config(model_name: str) -> Dict[str, object]:
+    """
+    Read the model's modules.json / Pooling config and return
+    {"mode": "mean" | "cls", "normalize": bool}, where normalize says whether
+    the stack ends in Normalize. Raises ValueError for stacks the ONNX path
+    can't reproduce (max/weighted pooling, Dense layers, ...).
+    """
+    modules = _read_st_config(model_name, "modules.json")
+    types = [m["type"] for m in modules]
+    unsupported = [t for t in types if t not in _SUPPORTED_ST_MODULES]
+    if unsupported:
+        raise ValueError(f"{model_name}: unsupported SentenceTransformer modules {unsupported}")
+    pooling = [m for m in modules if m["type"] == "sentence_transformers.models.Pooling"]
+    if len(pooling) != 1:
+        raise ValueError(f"{model_name}: expected one Pooling module, found {len(pooling)}")
+    cfg = _read_st_config(model_name, f"{pooling[0]['path']}/config.json")
+    modes = [k for k, v in cfg.items() if k.startswith("pooling_mode_") and v]
+    if len(modes) != 1 or modes[0] not in _POOLING_MODES:
+        raise ValueError(
+            f"{model_name}: pooling is {modes}, expected one of {sorted(_POOLING_MODES)}"
+        )
+    return {
+        "mode": _POOLING_MODES[modes[0]],
+        "normalize": "sentence_transformers.models.Normalize" in types,
+    }
+
+
+def _default_onnx_cache_dir() -> Path:
+    """Per-user cache for ONNX exports, kept out of the working tree."""
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "narrative_vectors" / "onnx"
+
+
+class OnnxFinanceEmbeddingVectorizer(BaseVectorizer):
+    """
+    The same finance model exported to ONNX and run on ONNX Runtime's CPU
+    provider, INT8 dynamically quantized by default. Token embeddings are
+    pooled the way the model's SentenceTransformer Pooling config says (CLS
+    token or attention-masked mean); other stacks raise ValueError. The
+    export, its tokenizer and the pooling config are saved once under
+    `cache_dir` (default: $XDG_CACHE_HOME or ~/.cache, then
+    narrative_vectors/onnx), so later constructions don't touch the Hub.
+    Lazy-imports; raises ImportError if optimum/onnxruntime are unavailable.
+    """
+    def __init__(
+        self,
+        model_name: str = "FinLang/finance-embeddings-investopedia",
+        normalize: bool = True,
+        batch_size: int = 32,
+        quantize: bool = True,
+        max_length: int = 512,
+        cache_dir: Optional[str] = None,
+    ):
+        try:
+            from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+            from optimum.onnxruntime.configuration import AutoQuantizationConfig
+            from transformers import AutoTokenizer  # lazy import
+        except Exception as e:
+            raise ImportError(
+                "optimum / onnxruntime not available. Install with:\n"
+                "  pip install \"optimum[onnxruntime]\""
+            ) from e
+
+        import json
+
+        if cache_dir is None:
+            cache_dir = _default_onnx_cache_dir()
+        export_dir = Path(cache_dir) / model_name.replace("/", "__")
+        file_name = "model_quantized.onnx" if quantize else "model.onnx"
+        pooling_path = export_dir / _POOLING_FILE
+        if pooling_path.exists():
+            with open(pooling_path, encoding="utf-8") as f:
+                pooling = json.load(f)
+        else:
+            # Checked before exporting so an unsupported model fails fast
+            pooling = _read_pooling_config(model_name)
+        if not (export_dir / file_name).exists():
+            model = ORTModelForFeatureExtraction.from_pretrained(
+                model_name, export=True, provider="CPUExecutionProvider"
+            )
+            model.save_pretrained(export_dir)
+            AutoTokenizer.from_pretrained(model_name).save_pretrained(export_dir)
+            if quantize:
+                qconfig = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+                ORTQuantizer.from_pretrained(model).quantize(
+                    save_dir=export_dir, quantization_config=qconfig
+                )
+        if not pooling_path.exists():
+            with open(pooling_path, "w", encoding="utf-8") as f:
+                json.dump(pooling, f)
+        self.model = ORTModelForFeatureExtraction.from_pretrained(
+            export_dir, file_name=file_name, provider="CPUExecutionProvider"
         )
-        return emb.astype("float32")
+        tokenizer_src = export_dir if (export_dir / "tokenizer_config.json").exists() else model_name
+        self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_src)
+        self._dim = self.model.config.hidden_size
+        self._pooling = pooling["mode"]
+        # A Normalize module in the stack always applies, as in SentenceTransformer
+        self._normalize = normalize or pooling["normalize"]
+        self._batch_size = batch_size
+        self._max_length = max_length
+        self._fitted = True  # pretrained
+
+    def fit(self, texts: List[str]) -> None:
+        print("OnnxFinanceEmbeddingVectorizer: fit() is a no-op for pretrained models.")
+        self._fitted = True  # no-op
+
+    def transform(self, texts: List[str]) -> np.ndarray:
+        if not self._fitted:
+            raise RuntimeError("Vectorizer must be fitted before transform()")
+        if not texts:
+            return np.empty((0, self._dim), dtype="float32")
+        out = np.empty((len(texts), self._dim), dtype="float32")
+        # Length-sorted batches to minimize padding (see FinanceEmbeddingVectorizer)
+        order = np.argsort([len(t) for t in texts], kind="stable")
+        for start in range(0, len(order), self._batch_size):
+            idx = order[start:start + self._batch_size]
+            enc = self.tokenizer(
+                [texts[i] for i in idx], padding=True, truncation=True,
+                max_length=self._max_length, return_tensors="np",
+            )
+            hidden = self.model(**enc).last_hidden_state
+            if self._pooling == "cls":
+                emb = hidden[:, 0].astype("float32")
+            else:
+                mask = enc["attention_mask"][..., None].astype("float32")
+                emb = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            if self._normalize:
+                emb /= np.maximum(np.linalg.norm(emb, axis=1, keepdims=True), 1e-12)
+            out[idx] = emb
+        return out
 
     @property
     def dim(self) -> int: return self._dim
 
+def to_dense(emb: Embeddings) -> np.ndarray:
+    """Densify a transform() result for callers that need an ndarray."""
+    if sparse.issparse(emb):
+        return emb.toarray()
+    return np.asarray(emb)
+
 # ================= Factory (robust selection) =================
+def _cpu_only(device: Optional[str]) -> bool:
+    if device == "cpu":
+        return True
+    try:
+        return _select_device() == "cpu"
+    except Exception:
+        return True  # no usable torch -> certainly no GPU path
+
 def get_vectorizer(
     prefer_finance: bool = True,
     tfidf_dim: int = 512,
@@ -94,17 +423,33 @@ def get_vectorizer(
     device: Optional[str] = None,
     normalize: bool = True,
     batch_size: int = 32,
+    force_tfidf: bool = False,
 ) -> BaseVectorizer:
     """
     Try finance embeddings first; if that import/runtime fails, fall back to TF–IDF.
+    Without a GPU (device "cpu", or None with no CUDA/MPS found) the ONNX
+    Runtime INT8 variant is tried before the SentenceTransformer one.
+    force_tfidf=True returns TF–IDF without probing (no torch import cost).
     """
+    if force_tfidf:
+        return TfidfVectorizerWrapper(max_features=tfidf_dim)
     if prefer_finance:
+        if device in (None, "cpu") and _cpu_only(device):
+            try:
+                return OnnxFinanceEmbeddingVectorizer(
+                    model_name=finance_model, normalize=normalize, batch_size=batch_size
+                )
+            except Exception as e:
+                warnings.warn(
+                    f"OnnxFinanceEmbeddingVectorizer unavailable ({e}); "
+                    "trying FinanceEmbeddingVectorizer"
+                )
         try:
             return FinanceEmbeddingVectorizer(
                 model_name=finance_model, device=device,
                 normalize=normalize, batch_size=batch_size
             )
         except Exception as e:
-            raise e
-            # return TfidfVectorizerWrapper(max_features=tfidf_dim)
+            warnings.warn(f"FinanceEmbeddingVectorizer unavailable ({e}); falling back to TF-IDF")
+            return TfidfVectorizerWrapper(max_features=tfidf_dim)
     return TfidfVectorizerWrapper(max_features=tfidf_dim)